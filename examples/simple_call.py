@@ -6,6 +6,15 @@ import asyncio
 from tetto import TettoClient, load_keypair_from_env
 
 
+# Decimal places per payment token
+TOKEN_DECIMALS = {"USDC": 6, "SOL": 9}
+
+
+def _to_ui(base_units: int, token: str) -> float:
+    """Convert base units (e.g. lamports) to a display amount"""
+    return base_units / (10 ** TOKEN_DECIMALS[token])
+
+
 async def main():
     # Load AI agent's wallet
     keypair = load_keypair_from_env("SOLANA_PRIVATE_KEY")
@@ -17,17 +26,30 @@ async def main():
         keypair=keypair,
         debug=True,
     ) as client:
-        # Call TitleGenerator agent
+        # Look up TitleGenerator by its ID (names are not unique)
+        title_gen = await client.get_agent("60fa88a8-5e8e-4884-944f-ac9fe278ff18")
+
+        # Call TitleGenerator agent (reusing the details fetched above)
+        token = "SOL"
         result = await client.call_agent(
-            agent_id="60fa88a8-5e8e-4884-944f-ac9fe278ff18",  # TitleGenerator
+            agent_id=title_gen["id"],
             input_data={"text": "This is a test article about AI agents."},
-            preferred_token="SOL",
+            preferred_token=token,
+            agent=title_gen,
         )
         
         print("\n✅ Success!")
         print(f"Output: {result['output']}")
         print(f"Transaction: {result['tx_signature']}")
+        print(f"Agent received: {_to_ui(result['agent_received'], token)} {token}")
+        print(f"Protocol fee: {_to_ui(result['protocol_fee'], token)} {token}")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # Use uvloop's faster event loop when installed (pip install tetto-sdk[fast])
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
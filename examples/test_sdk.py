@@ -78,4 +78,10 @@ async def test_sdk():
 
 
 if __name__ == "__main__":
-    asyncio.run(test_sdk())
+    # Use uvloop's faster event loop when installed (pip install tetto-sdk[fast])
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(test_sdk())
+    else:
+        uvloop.run(test_sdk())
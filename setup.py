@@ -28,10 +28,16 @@ setup(
     install_requires=[
         "solana>=0.34.0",
         "solders>=0.21.0",
-        "httpx>=0.25.0",
+        "httpx[http2]>=0.25.0",
+        "websockets>=10.0",
         "pydantic>=2.0.0",
     ],
     extras_require={
+        "fast": [
+            "orjson>=3.8.0",
+            "ijson>=3.1.0",
+            "uvloop>=0.18.0; sys_platform != 'win32'",
+        ],
         "dev": [
             "pytest>=7.0.0",
             "pytest-asyncio>=0.21.0",
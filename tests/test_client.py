@@ -0,0 +1,164 @@
+"""
+Tests for TettoClient
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from solders.keypair import Keypair
+
+from tetto import TettoClient, TettoValidationError
+from tetto import client as client_module
+
+
+def _chunked_listing(count: int, chunk_size: int = 1024) -> httpx.MockTransport:
+    """Serve /api/agents as a multi-chunk streamed body"""
+    body = json.dumps({
+        "ok": True,
+        "agents": [
+            {"id": f"id-{i}", "name": f"A{i}", "price_usd": 0.01}
+            for i in range(count)
+        ],
+    }).encode()
+
+    async def chunks():
+        for start in range(0, len(body), chunk_size):
+            yield body[start:start + chunk_size]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=chunks())
+
+    return httpx.MockTransport(handler)
+
+
+def _find_agent(transport: httpx.MockTransport, **kwargs):
+    async def run():
+        client = TettoClient(api_url="https://tetto.test", network="devnet")
+        await client.http_client.aclose()
+        client.http_client = httpx.AsyncClient(transport=transport)
+        try:
+            return await client.find_agent(**kwargs)
+        finally:
+            await client.close()
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("name", ["A2", "A100", "A199"])
+def test_find_agent_streams_multi_chunk_listing(name):
+    pytest.importorskip("ijson")
+    agent = _find_agent(_chunked_listing(200), name=name)
+    assert agent is not None
+    assert agent["name"] == name
+
+
+def test_find_agent_by_id_streams_multi_chunk_listing():
+    pytest.importorskip("ijson")
+    agent = _find_agent(_chunked_listing(200), agent_id="id-3")
+    assert agent["name"] == "A3"
+
+
+def test_find_agent_returns_none_without_match():
+    assert _find_agent(_chunked_listing(200), name="Missing") is None
+
+
+def _call_agent(monkeypatch, input_data, handler, **agent_fields):
+    """call_agent() with a stubbed payment; returns (result, payments made)"""
+    payments = []
+
+    async def fake_payment(**kwargs):
+        payments.append(kwargs)
+        return "sig-1"
+
+    monkeypatch.setattr(client_module, "build_and_send_payment", fake_payment)
+    agent = {
+        "name": "Echo",
+        "owner_wallet": str(Keypair().pubkey()),
+        "price_usd": 0.01,
+        "fee_bps": 1000,
+        **agent_fields,
+    }
+
+    async def run():
+        client = TettoClient(api_url="https://tetto.test", network="devnet", keypair=Keypair())
+        await client.http_client.aclose()
+        client.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            return await client.call_agent("agent-1", input_data, agent=agent)
+        finally:
+            await client.close()
+
+    return asyncio.run(run()), payments
+
+
+def test_call_agent_encodes_input_orjson_rejects(monkeypatch):
+    bodies = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(json.loads(request.content))
+        return httpx.Response(200, json={"ok": True, "output": {}})
+
+    input_data = {1: "int key", "big": 2**70}
+    _, payments = _call_agent(monkeypatch, input_data, handler)
+    assert len(payments) == 1
+    assert bodies[0]["input"] == {"1": "int key", "big": 2**70}
+    assert bodies[0]["tx_signature"] == "sig-1"
+    assert bodies[0]["agent_id"] == "agent-1"
+
+
+def test_call_agent_rejects_unserializable_input_before_paying(monkeypatch):
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise AssertionError("no request expected")
+
+    with pytest.raises(TettoValidationError):
+        _call_agent(monkeypatch, {"when": object()}, handler)
+
+
+def test_shared_http_client_is_per_event_loop(monkeypatch):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"ok": True, "agents": []})
+
+    monkeypatch.setattr(
+        client_module,
+        "_new_http_client",
+        lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+
+    async def run():
+        async with TettoClient(api_url="https://tetto.test", network="devnet", shared_http=True) as client:
+            assert await client.list_agents() == []
+            return client.http_client
+
+    first = asyncio.run(run())
+    second = asyncio.run(run())
+    assert first is not second
+    assert first.is_closed and second.is_closed
+
+
+@pytest.mark.parametrize("missing", ["owner_wallet", "price_usd", "fee_bps"])
+def test_call_agent_rejects_agent_without_payment_details(monkeypatch, missing):
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise AssertionError("no request expected")
+
+    with pytest.raises(TettoValidationError, match=missing):
+        _call_agent(monkeypatch, {"text": "hi"}, handler, **{missing: None})
+
+
+def test_context_manager_warms_connection_with_head_on_api_root():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append((request.method, request.url.path))
+        return httpx.Response(200)
+
+    async def run():
+        client = TettoClient(api_url="https://tetto.test/", network="devnet")
+        await client.http_client.aclose()
+        client.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        async with client:
+            await client._warmup_task
+
+    asyncio.run(run())
+    assert requests == [("HEAD", "/")]
@@ -0,0 +1,237 @@
+"""
+Tests for payment transaction building and sending
+"""
+
+import asyncio
+import itertools
+import json
+import struct
+from types import SimpleNamespace
+
+import pytest
+from solana.rpc.core import RPCException
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from solders.transaction import Transaction
+from solders.transaction_status import TransactionConfirmationStatus
+
+from tetto import TettoPaymentUnconfirmedError
+from tetto import transactions
+
+USDC_MINT = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+
+_rpc_urls = itertools.count()
+
+
+class StubRPC:
+    """Stands in for solana's AsyncClient in send_many()"""
+
+    def __init__(self, reject=(), status_failures=0):
+        self.reject = set(reject)  # agent wallets whose payments fail
+        self.status_failures = status_failures
+        self.sent = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def get_latest_blockhash(self, commitment=None):
+        return SimpleNamespace(value=SimpleNamespace(blockhash=Hash.new_unique()))
+
+    async def send_raw_transaction(self, raw, opts=None):
+        tx = Transaction.from_bytes(raw)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if self.reject.intersection(tx.message.account_keys):
+            raise RPCException("Transaction simulation failed")
+        self.sent.append(tx)
+        return SimpleNamespace(value=tx.signatures[0])
+
+    async def get_signature_statuses(self, signatures, search_transaction_history=False):
+        if self.status_failures:
+            self.status_failures -= 1
+            raise RPCException("429 Too Many Requests")
+        status = SimpleNamespace(confirmation_status=TransactionConfirmationStatus.Confirmed, err=None)
+        return SimpleNamespace(value=[status] * len(signatures))
+
+
+def _send_many(rpc, payments, **kwargs):
+    rpc_url = f"https://rpc-{next(_rpc_urls)}.test"
+
+    async def run():
+        return await transactions.send_many(rpc_url, Keypair(), payments, **kwargs)
+
+    original = transactions._get_client
+    transactions._get_client = lambda url: rpc
+    try:
+        return asyncio.run(run())
+    finally:
+        transactions._get_client = original
+
+
+def _signatures(rpc):
+    return {str(tx.signatures[0]) for tx in rpc.sent}
+
+
+def _payment(price_usd="0.02"):
+    return {
+        "agent_wallet": Keypair().pubkey(),
+        "protocol_wallet": Keypair().pubkey(),
+        "price_usd": price_usd,
+        "token": "SOL",
+        "sol_price": 150.0,
+    }
+
+
+def test_send_many_reports_rejected_payment_in_place():
+    payments = [_payment(), _payment(), _payment()]
+    rpc = StubRPC(reject={payments[1]["agent_wallet"]})
+    results = _send_many(rpc, payments)
+    assert isinstance(results[1], RPCException)
+    assert {results[0], results[2]} == _signatures(rpc)
+
+
+def test_send_many_retries_failed_status_checks(monkeypatch):
+    monkeypatch.setattr(transactions, "CONFIRM_POLL_INTERVAL", 0.01)
+    rpc = StubRPC(status_failures=2)
+    results = _send_many(rpc, [_payment(), _payment()])
+    assert set(results) == _signatures(rpc)
+
+
+def test_send_many_keeps_signatures_when_status_checks_keep_failing(monkeypatch):
+    monkeypatch.setattr(transactions, "CONFIRM_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(transactions, "CONFIRM_TIMEOUT", 0.05)
+    rpc = StubRPC(status_failures=10**6)
+    results = _send_many(rpc, [_payment(), _payment()])
+    assert all(isinstance(result, TettoPaymentUnconfirmedError) for result in results)
+    assert all(isinstance(result.__cause__, RPCException) for result in results)
+    assert {result.tx_signature for result in results} == _signatures(rpc)
+
+
+def test_send_many_sends_duplicate_payments_as_distinct_transactions():
+    payment = _payment()
+    rpc = StubRPC()
+    results = _send_many(rpc, [payment, dict(payment)])
+    assert len(set(results)) == 2
+    assert rpc.sent[0].message.recent_blockhash != rpc.sent[1].message.recent_blockhash
+
+
+def test_send_many_honors_batch_size():
+    rpc = StubRPC()
+    results = _send_many(rpc, [_payment() for _ in range(5)], batch_size=2, wait_for_confirmation=False)
+    assert len(results) == 5
+    assert all(isinstance(result, str) for result in results)
+    assert rpc.max_in_flight <= 2
+
+
+@pytest.mark.parametrize("batch_size", [0, -1])
+def test_send_many_rejects_batch_size_below_one(batch_size):
+    with pytest.raises(ValueError):
+        _send_many(StubRPC(), [_payment()], batch_size=batch_size)
+
+
+def _amounts(instructions):
+    """Transfer amounts encoded in the agent and protocol instructions"""
+    amounts = []
+    for ix in instructions:
+        if ix.program_id == transactions.TOKEN_PROGRAM_ID:
+            amounts.append(struct.unpack_from("<Q", bytes(ix.data), 1)[0])
+        else:
+            amounts.append(struct.unpack_from("<Q", bytes(ix.data), 4)[0])
+    return amounts
+
+
+@pytest.mark.parametrize("fee_bps", [1000, 1000.0])
+def test_payment_instructions_usdc_amounts(fee_bps):
+    instructions = transactions._payment_instructions(
+        Keypair().pubkey(), Keypair().pubkey(), Keypair().pubkey(),
+        price_usd=2.01, usdc_mint=USDC_MINT, fee_bps=fee_bps,
+    )
+    assert _amounts(instructions) == [2010000 - 201000, 201000]
+
+
+@pytest.mark.parametrize("use_transfer_checked", [True, False])
+def test_payment_instructions_usdc_fee_leg_forms(use_transfer_checked):
+    instructions = transactions._payment_instructions(
+        Keypair().pubkey(), Keypair().pubkey(), Keypair().pubkey(),
+        price_usd="0.02", usdc_mint=USDC_MINT, use_transfer_checked=use_transfer_checked,
+    )
+    assert _amounts(instructions) == [18000, 2000]
+    assert bytes(instructions[1].data)[0] == (
+        transactions.TRANSFER_CHECKED_IX if use_transfer_checked else transactions.TRANSFER_IX
+    )
+
+
+def test_payment_instructions_sol_amounts():
+    instructions = transactions._payment_instructions(
+        Keypair().pubkey(), Keypair().pubkey(), Keypair().pubkey(),
+        price_usd=2.01, token="SOL", sol_price=150.0, fee_bps=1000.0,
+    )
+    # 2.01 / 150 SOL = 13400000 lamports
+    assert _amounts(instructions) == [13400000 - 1340000, 1340000]
+
+
+def test_payment_instructions_sol_requires_price():
+    with pytest.raises(ValueError):
+        transactions._payment_instructions(
+            Keypair().pubkey(), Keypair().pubkey(), Keypair().pubkey(),
+            price_usd=0.02, token="SOL",
+        )
+
+
+@pytest.mark.parametrize("fee_bps", [1000.5, -1, 10001])
+def test_payment_instructions_rejects_invalid_fee_bps(fee_bps):
+    with pytest.raises(ValueError):
+        transactions._payment_instructions(
+            Keypair().pubkey(), Keypair().pubkey(), Keypair().pubkey(),
+            price_usd=0.02, usdc_mint=USDC_MINT, fee_bps=fee_bps,
+        )
+
+
+@pytest.fixture
+def ata_bumps(monkeypatch):
+    """Empty ATA memo for the test, restored afterwards"""
+    monkeypatch.setattr(transactions, "_ATA_BUMPS", {})
+    transactions._ata_cached.cache_clear()
+    yield transactions._ATA_BUMPS
+    transactions._ata_cached.cache_clear()
+
+
+def test_ata_cache_round_trip(tmp_path, ata_bumps):
+    wallet, mint = Keypair().pubkey(), Pubkey.from_string(USDC_MINT)
+    ata = transactions.get_associated_token_address(wallet, mint)
+    transactions.save_ata_cache(tmp_path / "ata.json")
+
+    ata_bumps.clear()
+    transactions._ata_cached.cache_clear()
+    assert transactions.load_ata_cache(tmp_path / "ata.json") == 1
+    assert transactions.get_associated_token_address(wallet, mint) == ata
+
+
+@pytest.mark.parametrize("bump", ["255", 1.5, True, 256])
+def test_load_ata_cache_rejects_invalid_bump(tmp_path, ata_bumps, bump):
+    wallet = Keypair().pubkey()
+    path = tmp_path / "ata.json"
+    path.write_text(json.dumps({f"{wallet}:{USDC_MINT}": {"bump": bump, "ata": str(wallet)}}))
+    with pytest.raises(ValueError):
+        transactions.load_ata_cache(path)
+
+
+def test_load_ata_cache_rejects_bump_that_does_not_derive_ata(tmp_path, ata_bumps):
+    wallet, mint = Keypair().pubkey(), Pubkey.from_string(USDC_MINT)
+    ata = transactions.get_associated_token_address(wallet, mint)
+    bump = ata_bumps[(bytes(wallet), bytes(mint))][0]
+    path = tmp_path / "ata.json"
+    path.write_text(json.dumps({f"{wallet}:{mint}": {"bump": (bump - 1) % 256, "ata": str(ata)}}))
+    with pytest.raises(ValueError):
+        transactions.load_ata_cache(path)
+
+
+def test_ata_bumps_are_bounded(monkeypatch, ata_bumps):
+    monkeypatch.setattr(transactions, "ATA_BUMPS_MAXSIZE", 3)
+    mint = Pubkey.from_string(USDC_MINT)
+    wallets = [Keypair().pubkey() for _ in range(5)]
+    for wallet in wallets:
+        transactions.get_associated_token_address(wallet, mint)
+    assert list(ata_bumps) == [(bytes(wallet), bytes(mint)) for wallet in wallets[2:]]
@@ -0,0 +1,30 @@
+"""
+Tests for wallet loading
+"""
+
+import json
+
+import pytest
+from solders.keypair import Keypair
+
+from tetto import load_keypair_from_env
+
+
+def test_load_keypair_from_env_accepts_json_and_base58(monkeypatch):
+    keypair = Keypair()
+    for secret in (json.dumps(list(bytes(keypair))), str(keypair)):
+        monkeypatch.setenv("TETTO_TEST_KEY", secret)
+        assert load_keypair_from_env("TETTO_TEST_KEY").pubkey() == keypair.pubkey()
+
+
+@pytest.mark.parametrize("secret", [
+    "[1, 2",
+    json.dumps([300] * 64),
+    json.dumps(["a"] * 64),
+    json.dumps([1] * 32),
+    "not-base58-0OIl",
+])
+def test_load_keypair_from_env_rejects_malformed_secret(monkeypatch, secret):
+    monkeypatch.setenv("TETTO_TEST_KEY", secret)
+    with pytest.raises(ValueError, match="Invalid keypair format"):
+        load_keypair_from_env("TETTO_TEST_KEY")
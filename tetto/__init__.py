@@ -5,6 +5,17 @@ Python client for autonomous AI agent payments on Solana.
 """
 
 from .client import TettoClient
+from .exceptions import (
+    TettoError,
+    TettoAPIError,
+    TettoValidationError,
+    TettoInsufficientFundsError,
+    TettoPaymentSentError,
+    TettoPaymentUnconfirmedError,
+    TettoTransactionError,
+    TettoTransactionFailedError,
+    TettoTransientError,
+)
 from .wallet import (
     load_keypair_from_file,
     load_keypair_from_env,
@@ -14,6 +25,15 @@ from .wallet import (
 __version__ = "0.1.0"
 __all__ = [
     "TettoClient",
+    "TettoError",
+    "TettoAPIError",
+    "TettoValidationError",
+    "TettoInsufficientFundsError",
+    "TettoPaymentSentError",
+    "TettoPaymentUnconfirmedError",
+    "TettoTransactionError",
+    "TettoTransactionFailedError",
+    "TettoTransientError",
     "load_keypair_from_file",
     "load_keypair_from_env",
     "generate_keypair",
@@ -0,0 +1,36 @@
+"""
+JSON encode/decode helpers
+
+Uses orjson when it is installed (pip install tetto-sdk[fast]) and falls
+back to the standard library json module otherwise.
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serialize obj to UTF-8 JSON bytes
+
+    orjson rejects some values the json module accepts (non-str dict keys,
+    integers wider than 64 bits); those fall back to the json module.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            pass
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Deserialize JSON bytes or str"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -4,11 +4,170 @@ Tetto Python SDK - Main Client
 Enables AI agents to autonomously call and pay for services from other agents.
 """
 
+import asyncio
+import random
+import time
 import httpx
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple, Union
 from solders.keypair import Keypair
 from solders.pubkey import Pubkey
 
+from ._json import dumps, loads
+from .exceptions import (
+    TettoAPIError,
+    TettoError,
+    TettoInsufficientFundsError,
+    TettoPaymentSentError,
+    TettoPaymentUnconfirmedError,
+    TettoTransientError,
+    TettoValidationError,
+)
+from .pricing import PriceCache
+from .transactions import (
+    build_and_send_payment,
+    get_associated_token_address,
+    get_blockhash_cache,
+    get_recent_blockhash,
+)
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover - optional dependency
+    ijson = None
+
+
+# Upper bound on cached get_agent() entries per client
+AGENT_CACHE_MAXSIZE = 256
+
+# Retry policy for transient API failures
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+MAX_RETRIES = 3
+RETRY_BASE_DELAY = 0.2
+RETRY_MAX_DELAY = 5.0
+
+
+# HTTP clients for shared_http=True: event loop -> client
+_shared_http_clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+
+# Per-loop tasks that close that loop's shared HTTP client when it shuts down
+_shared_http_closers: Dict[asyncio.AbstractEventLoop, asyncio.Task] = {}
+
+
+def _new_http_client() -> httpx.AsyncClient:
+    """HTTP/2 client with a keep-alive pool sized for concurrent agent calls"""
+    return httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(
+            max_keepalive_connections=20,
+            max_connections=100,
+            keepalive_expiry=30.0,
+        ),
+        timeout=30.0,
+    )
+
+
+async def _close_shared_http_client(loop: asyncio.AbstractEventLoop):
+    """Idle until cancelled at loop shutdown, then close loop's shared HTTP client"""
+    try:
+        await loop.create_future()
+    except asyncio.CancelledError:
+        _shared_http_closers.pop(loop, None)
+        client = _shared_http_clients.pop(loop, None)
+        if client is not None:
+            await client.aclose()
+        raise
+
+
+def _api_error(
+    response: httpx.Response,
+    data: Optional[Dict],
+    default_message: str,
+) -> TettoAPIError:
+    """Map an API error response to the matching exception type"""
+    data = data or {}
+    message = data.get("error") or default_message
+    error_code = data.get("error_code")
+    status = response.status_code
+    code = (error_code or "").upper()
+
+    if status in RETRY_STATUS_CODES:
+        return TettoTransientError(
+            message,
+            status_code=status,
+            error_code=error_code,
+            retry_after=_retry_after_seconds(response),
+        )
+    if status == 402 or "INSUFFICIENT" in code:
+        return TettoInsufficientFundsError(message, status_code=status, error_code=error_code)
+    if status in (400, 404, 422) or "INVALID" in code or "VALIDATION" in code:
+        return TettoValidationError(message, status_code=status, error_code=error_code)
+    return TettoAPIError(message, status_code=status, error_code=error_code)
+
+
+def _parse_response(response: httpx.Response, default_message: str) -> Dict:
+    """Decode an API response, raising a typed error unless it is ok"""
+    try:
+        data = loads(response.content)
+    except ValueError:
+        data = None
+
+    if not isinstance(data, dict) or not data.get("ok"):
+        raise _api_error(response, data if isinstance(data, dict) else None, default_message)
+
+    return data
+
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Parse a numeric Retry-After header, capped at RETRY_MAX_DELAY"""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return min(RETRY_MAX_DELAY, max(0.0, float(value)))
+    except ValueError:
+        return None
+
+
+def _agent_matches(agent: Dict, name: Optional[str], agent_id: Optional[str]) -> bool:
+    """Check an agent dict against find_agent() filters"""
+    if name is not None and agent.get("name") != name:
+        return False
+    if agent_id is not None and agent.get("id") != agent_id:
+        return False
+    return True
+
+
+async def _stream_find_agent(
+    response: httpx.Response,
+    name: Optional[str],
+    agent_id: Optional[str],
+) -> Optional[Dict]:
+    """Parse a streamed /api/agents response, stopping at the first match"""
+    agents = ijson.sendable_list()
+    parser = ijson.items_coro(agents, "agents.item", use_float=True)
+    complete = False
+    try:
+        async for chunk in response.aiter_bytes():
+            parser.send(chunk)
+            for agent in agents:
+                if _agent_matches(agent, name, agent_id):
+                    return agent
+            del agents[:]
+        complete = True
+    finally:
+        try:
+            parser.close()
+        except ijson.IncompleteJSONError:
+            # Expected when we stop before the end of the document
+            if complete:
+                raise
+
+    # Closing the parser can flush items from the final chunk
+    for agent in agents:
+        if _agent_matches(agent, name, agent_id):
+            return agent
+    return None
+
 
 class TettoClient:
     """
@@ -37,6 +196,11 @@ class TettoClient:
         keypair: Optional[Keypair] = None,
         rpc_url: Optional[str] = None,
         protocol_wallet: Optional[str] = None,
+        agent_cache_ttl: float = 60.0,
+        list_cache_ttl: float = 15.0,
+        shared_http: bool = False,
+        blockhash_refresh_interval: Optional[float] = None,
+        price_refresh_interval: Optional[float] = None,
         debug: bool = False,
     ):
         """
@@ -48,6 +212,14 @@ class TettoClient:
             keypair: Solana keypair for signing transactions
             rpc_url: Custom RPC URL (optional)
             protocol_wallet: Custom protocol wallet (optional)
+            agent_cache_ttl: Seconds to cache get_agent() results (0 disables)
+            list_cache_ttl: Seconds to reuse list_agents() before revalidating
+            shared_http: Reuse one HTTP connection pool across all clients
+                on the same event loop
+            blockhash_refresh_interval: Seconds between background blockhash
+                refreshes while used as a context manager (None disables)
+            price_refresh_interval: Seconds between background SOL/USD price
+                refreshes while used as a context manager (None disables)
             debug: Enable debug logging
         """
         self.api_url = api_url.rstrip("/")
@@ -55,6 +227,17 @@ class TettoClient:
         self.keypair = keypair
         self.debug = debug
 
+        # Base58 encoding of the payer pubkey, reused by every call
+        self._payer_str = str(keypair.pubkey()) if keypair else None
+
+        # agent_id -> (expires_at, agent)
+        self.agent_cache_ttl = agent_cache_ttl
+        self._agent_cache: Dict[str, Tuple[float, Dict]] = {}
+
+        # Last list_agents() response: etag, ts, agents, and by_name/by_id indexes
+        self.list_cache_ttl = list_cache_ttl
+        self._agents_cache: Optional[Dict[str, Any]] = None
+
         # Network configuration
         if network == "mainnet":
             self.rpc_url = rpc_url or "https://api.mainnet-beta.solana.com"
@@ -65,20 +248,40 @@ class TettoClient:
             self.protocol_wallet = protocol_wallet or "BubFsAG8cSEH7NkLpZijctRpsZkCiaWqCdRfh8kUpXEt"
             self.usdc_mint = "EGzSiubUqhzWFR2KxWCx6jHD6XNsVhKrnebjcQdN6qK4"
 
-        self.http_client = httpx.AsyncClient(timeout=30.0)
+        self._protocol_wallet_pk = Pubkey.from_string(self.protocol_wallet)
+        self._usdc_mint_pk = Pubkey.from_string(self.usdc_mint)
+
+        # Payer and protocol USDC token accounts are fixed for the client's lifetime
+        self._payer_ata = (
+            get_associated_token_address(keypair.pubkey(), self._usdc_mint_pk) if keypair else None
+        )
+        self._protocol_ata = get_associated_token_address(self._protocol_wallet_pk, self._usdc_mint_pk)
+
+        self._warmup_task: Optional[asyncio.Task] = None
+        self.blockhash_refresh_interval = blockhash_refresh_interval
+        self._blockhash_updater_running = False
+        self.price_refresh_interval = price_refresh_interval
+        self._price_cache = PriceCache(self._fetch_sol_price)
+
+        # None in shared mode: the pool is looked up per event loop on use
+        self.shared_http = shared_http
+        self._http_client = None if shared_http else _new_http_client()
 
         if self.debug:
-            print(f"=' TettoClient initialized")
+            print(f"🔧 TettoClient initialized")
             print(f"   API: {self.api_url}")
             print(f"   Network: {self.network}")
             print(f"   RPC: {self.rpc_url}")
             if self.keypair:
-                print(f"   Wallet: {str(self.keypair.pubkey())[:8]}...")
+                print(f"   Wallet: {self._payer_str[:8]}...")
 
     async def list_agents(self) -> List[Dict]:
         """
         List all active agents in the marketplace
 
+        The listing is reused for ``list_cache_ttl`` seconds, then revalidated
+        with ``If-None-Match`` so an unchanged listing costs a 304 only.
+
         Returns:
             List of agent dictionaries
 
@@ -87,40 +290,137 @@ class TettoClient:
             >>> for agent in agents:
             ...     print(f"{agent['name']}: ${agent['price_usd']}")
         """
-        response = await self.http_client.get(f"{self.api_url}/api/agents")
-        data = response.json()
+        cache = self._agents_cache
+        if cache and time.monotonic() - cache["ts"] < self.list_cache_ttl:
+            return cache["agents"]
 
-        if not data.get("ok"):
-            raise Exception(data.get("error", "Failed to list agents"))
+        headers = {}
+        if cache and cache["etag"]:
+            headers["If-None-Match"] = cache["etag"]
+
+        response = await self._request("GET", f"{self.api_url}/api/agents", headers=headers)
+
+        if response.status_code == 304 and cache:
+            cache["ts"] = time.monotonic()
+            return cache["agents"]
+
+        data = _parse_response(response, "Failed to list agents")
 
         if self.debug:
-            print(f"= Found {len(data['agents'])} agents")
+            print(f"📋 Found {len(data['agents'])} agents")
+
+        by_name: Dict[str, Dict] = {}
+        by_id: Dict[str, Dict] = {}
+        for agent in data["agents"]:
+            by_name.setdefault(agent.get("name"), agent)
+            by_id.setdefault(agent.get("id"), agent)
+
+        self._agents_cache = {
+            "etag": response.headers.get("etag"),
+            "ts": time.monotonic(),
+            "agents": data["agents"],
+            "by_name": by_name,
+            "by_id": by_id,
+        }
 
         return data["agents"]
 
+    async def find_agent(
+        self,
+        name: Optional[str] = None,
+        agent_id: Optional[str] = None,
+    ) -> Optional[Dict]:
+        """
+        Find an agent in the marketplace listing by name or ID
+
+        Names are not unique; the first match is returned, so prefer
+        agent_id (or get_agent()) before paying an agent.
+
+        Uses the cached list_agents() result when it is fresh. Otherwise, if
+        ijson is installed, the listing is streamed and parsing stops at the
+        first match instead of building every agent dict.
+
+        Args:
+            name: Agent name (e.g., "TitleGenerator")
+            agent_id: Agent UUID
+
+        Returns:
+            Agent dictionary, or None if no agent matches
+
+        Example:
+            >>> title_gen = await client.find_agent(name="TitleGenerator")
+        """
+        if name is None and agent_id is None:
+            raise ValueError("find_agent() requires name or agent_id")
+
+        cache = self._agents_cache
+        cache_fresh = cache and time.monotonic() - cache["ts"] < self.list_cache_ttl
+
+        if ijson is not None and not cache_fresh:
+            params = {"name": name} if name is not None else {}
+            async with self.http_client.stream(
+                "GET", f"{self.api_url}/api/agents", params=params
+            ) as response:
+                if response.status_code == 200:
+                    return await _stream_find_agent(response, name, agent_id)
+
+        await self.list_agents()
+        cache = self._agents_cache
+        if agent_id is not None:
+            agent = cache["by_id"].get(agent_id)
+        else:
+            agent = cache["by_name"].get(name)
+
+        if agent is not None and _agent_matches(agent, name, agent_id):
+            return agent
+        return None
+
     async def get_agent(self, agent_id: str) -> Dict:
         """
         Get agent details by ID
 
+        Results are cached in memory for ``agent_cache_ttl`` seconds.
+
         Args:
             agent_id: Agent UUID
 
         Returns:
             Agent dictionary with schemas, price, etc.
         """
-        response = await self.http_client.get(f"{self.api_url}/api/agents/{agent_id}")
-        data = response.json()
-
-        if not data.get("ok"):
-            raise Exception(data.get("error", "Agent not found"))
-
-        return data["agent"]
+        cached = self._agent_cache.get(agent_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        response = await self._request("GET", f"{self.api_url}/api/agents/{agent_id}")
+        try:
+            data = _parse_response(response, "Agent not found")
+        except TettoAPIError:
+            self._agent_cache.pop(agent_id, None)
+            raise
+
+        agent = data["agent"]
+        if self.agent_cache_ttl > 0:
+            if len(self._agent_cache) >= AGENT_CACHE_MAXSIZE:
+                self._evict_expired_agents()
+            self._agent_cache[agent_id] = (time.monotonic() + self.agent_cache_ttl, agent)
+
+        return agent
+
+    def _evict_expired_agents(self):
+        """Drop expired entries, or the oldest one if none have expired"""
+        now = time.monotonic()
+        expired = [key for key, (expires_at, _) in self._agent_cache.items() if expires_at <= now]
+        for key in expired:
+            del self._agent_cache[key]
+        if not expired:
+            del self._agent_cache[next(iter(self._agent_cache))]
 
     async def call_agent(
         self,
         agent_id: str,
         input_data: Dict,
         preferred_token: str = "USDC",
+        agent: Optional[Dict] = None,
     ) -> Dict:
         """
         Call an agent with autonomous payment
@@ -133,6 +433,8 @@ class TettoClient:
             agent_id: Agent UUID
             input_data: Input matching agent's input schema
             preferred_token: 'USDC' or 'SOL' (default: USDC)
+            agent: Prefetched get_agent() result (skips the lookup); must
+                carry owner_wallet, price_usd and fee_bps
 
         Returns:
             {
@@ -146,70 +448,276 @@ class TettoClient:
             }
 
         Raises:
-            Exception: If no keypair, insufficient funds, or call fails
+            TettoError: If no keypair is configured
+            TettoValidationError: If the agent lookup is rejected, agent
+                lacks payment details, or input_data cannot be serialized
+                to JSON (all before paying)
+            TettoTransactionFailedError: If the payment failed on-chain
+                (nothing was paid)
+            TettoPaymentSentError: If the call fails after the payment was
+                sent, or the payment's outcome is unknown; do not retry
+                without reconciling its tx_signature
+            TettoAPIError: If the call fails for another reason
         """
         if not self.keypair:
-            raise Exception(
+            raise TettoError(
                 "Keypair required for payments. "
                 "Initialize TettoClient with keypair parameter."
             )
 
-        # Get agent details
-        agent = await self.get_agent(agent_id)
+        # Agent lookup (API) and blockhash (RPC) are independent, so overlap them
+        if agent is None:
+            agent, recent_blockhash = await asyncio.gather(
+                self.get_agent(agent_id),
+                self._prefetch_blockhash(),
+            )
+        else:
+            # Listing entries may lack payment fields; paying with defaults would pay wrongly
+            if agent.get("id", agent_id) != agent_id:
+                raise TettoValidationError(f"agent is {agent['id']}, not {agent_id}")
+            missing = [key for key in ("owner_wallet", "price_usd", "fee_bps") if agent.get(key) is None]
+            if missing:
+                raise TettoValidationError(
+                    f"agent is missing {', '.join(missing)}; pass a get_agent() result"
+                )
+            recent_blockhash = None
 
         if self.debug:
-            print(f"> Calling agent: {agent['name']}")
+            print(f"🤖 Calling agent: {agent['name']}")
             print(f"   Price: ${agent['price_usd']} USD")
             print(f"   Token: {preferred_token}")
 
-        # Build, sign, and send payment transaction
-        from .transactions import build_and_send_payment
-
-        tx_signature = await build_and_send_payment(
-            rpc_url=self.rpc_url,
-            payer_keypair=self.keypair,
-            agent_wallet=Pubkey.from_string(agent["owner_wallet"]),
-            protocol_wallet=Pubkey.from_string(self.protocol_wallet),
-            price_usd=agent["price_usd"],
-            token=preferred_token,
-            usdc_mint=self.usdc_mint,
-            fee_bps=agent.get("fee_bps", 1000),
-            debug=self.debug,
-        )
-
-        if self.debug:
-            print(f"    Transaction sent: {tx_signature}")
-            print(f"   Calling backend API...")
-
-        # Call backend API with transaction proof
-        response = await self.http_client.post(
-            f"{self.api_url}/api/agents/call",
-            json={
+        # Encode the request before paying, so input that cannot be sent
+        # fails while nothing has been paid; tx_signature is appended later
+        try:
+            body = dumps({
                 "agent_id": agent_id,
                 "input": input_data,
-                "caller_wallet": str(self.keypair.pubkey()),
-                "tx_signature": tx_signature,
+                "caller_wallet": self._payer_str,
                 "selected_token": preferred_token,
-            },
-        )
+            })
+        except (TypeError, ValueError) as e:
+            raise TettoValidationError(f"input_data is not JSON serializable: {e}") from e
+
+        sol_price = await self._price_cache.latest() if preferred_token == "SOL" else None
 
-        data = response.json()
+        # Build, sign, and send payment transaction
+        try:
+            tx_signature = await build_and_send_payment(
+                rpc_url=self.rpc_url,
+                payer_keypair=self.keypair,
+                agent_wallet=Pubkey.from_string(agent["owner_wallet"]),
+                protocol_wallet=self._protocol_wallet_pk,
+                price_usd=agent["price_usd"],
+                token=preferred_token,
+                usdc_mint=self._usdc_mint_pk,
+                fee_bps=agent.get("fee_bps", 1000),
+                debug=self.debug,
+                recent_blockhash=recent_blockhash,
+                sol_price=sol_price,
+                payer_ata=self._payer_ata,
+                protocol_ata=self._protocol_ata,
+            )
+        except TettoPaymentUnconfirmedError as e:
+            # Sent, but it may still land: paying again could pay twice
+            raise TettoPaymentSentError(str(e), tx_signature=e.tx_signature) from e
+
+        if self.debug:
+            print(f"   ✅ Transaction sent: {tx_signature}")
+            print(f"   Calling backend API...")
 
-        if not data.get("ok"):
-            raise Exception(data.get("error", "Agent call failed"))
+        # Call backend API with transaction proof (never retried: payment already sent)
+        try:
+            response = await self._request(
+                "POST",
+                f"{self.api_url}/api/agents/call",
+                retry=False,
+                content=body[:-1] + b',"tx_signature":' + dumps(tx_signature) + b"}",
+                headers={"content-type": "application/json"},
+            )
+            data = _parse_response(response, "Agent call failed")
+        except TettoAPIError as e:
+            # Price or wallet may have changed since the agent was cached
+            self._agent_cache.pop(agent_id, None)
+            raise TettoPaymentSentError(
+                f"{e} (payment {tx_signature} was already sent)",
+                tx_signature=tx_signature,
+                status_code=e.status_code,
+                error_code=e.error_code,
+            ) from e
 
         if self.debug:
-            print(f"    Call successful!")
+            print(f"   ✅ Call successful!")
             print(f"   Output keys: {list(data.get('output', {}).keys())}")
 
         return data
 
+    async def call_agents(
+        self,
+        calls: List[Dict],
+        concurrency: int = 8,
+    ) -> List[Union[Dict, BaseException]]:
+        """
+        Call several agents concurrently
+
+        Each entry in ``calls`` holds call_agent() keyword arguments. At most
+        ``concurrency`` calls are in flight at once.
+
+        Args:
+            calls: List of call_agent() kwargs dicts
+            concurrency: Maximum number of calls in flight (default: 8, at least 1)
+
+        Returns:
+            Results in the same order as ``calls``. A failed call yields its
+            exception instead of a result dict; a TettoPaymentSentError
+            means that call was already paid for.
+
+        Example:
+            >>> results = await client.call_agents([
+            ...     {"agent_id": "uuid-1", "input_data": {"text": "One"}},
+            ...     {"agent_id": "uuid-2", "input_data": {"text": "Two"}},
+            ... ])
+        """
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _call_one(kwargs: Dict) -> Dict:
+            async with semaphore:
+                return await self.call_agent(**kwargs)
+
+        return await asyncio.gather(
+            *[_call_one(kwargs) for kwargs in calls],
+            return_exceptions=True,
+        )
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        retry: bool = True,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        Send an API request, retrying transient failures
+
+        Connection errors, timeouts, and 429/502/503/504 responses raise
+        TettoTransientError. Those are retried up to MAX_RETRIES times with
+        exponential backoff plus jitter, honoring Retry-After when the server
+        sends one. Pass retry=False for requests that are not safe to repeat.
+        """
+        attempt = 0
+        while True:
+            try:
+                try:
+                    response = await self.http_client.request(method, url, **kwargs)
+                except httpx.TransportError as e:
+                    raise TettoTransientError(f"{method} {url} failed: {e!r}") from e
+
+                if response.status_code in RETRY_STATUS_CODES:
+                    try:
+                        data = loads(response.content)
+                    except ValueError:
+                        data = None
+                    raise _api_error(
+                        response,
+                        data if isinstance(data, dict) else None,
+                        f"{method} {url} returned HTTP {response.status_code}",
+                    )
+                return response
+            except TettoTransientError as e:
+                if not retry or attempt >= MAX_RETRIES:
+                    raise
+                delay = e.retry_after
+                if delay is None:
+                    delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt) + random.uniform(0, 0.1)
+
+            attempt += 1
+            if self.debug:
+                print(f"   ⏳ Retrying {method} {url} in {delay:.2f}s (attempt {attempt}/{MAX_RETRIES})")
+            await asyncio.sleep(delay)
+
+    async def _prewarm(self):
+        """
+        Open the API connection used by /api/agents/call
+
+        Sends one HEAD request for the API root, so the TLS/HTTP/2 setup is
+        done before the first payment is ready to submit. (The call endpoint
+        itself is POST-only and would answer 405.) Run once from
+        __aenter__; later calls reuse the pooled keep-alive connection.
+        """
+        try:
+            await self.http_client.head(self.api_url)
+        except httpx.HTTPError:
+            pass
+
+    async def _fetch_sol_price(self) -> float:
+        """Fetch the current SOL/USD price from the Tetto API"""
+        response = await self._request("GET", f"{self.api_url}/api/price/sol")
+        data = _parse_response(response, "Failed to fetch SOL price")
+        price = data.get("price_usd", data.get("price"))
+        if isinstance(price, bool) or not isinstance(price, (int, float)) or price <= 0:
+            raise TettoAPIError(
+                f"Invalid SOL price in response: {price!r}",
+                status_code=response.status_code,
+            )
+        return float(price)
+
+    async def _prefetch_blockhash(self):
+        """Fetch a recent blockhash for the next payment"""
+        return await get_recent_blockhash(self.rpc_url)
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """HTTP client for API requests (the running loop's shared one with shared_http)"""
+        if self._http_client is None:
+            return self.shared_http_client()
+        return self._http_client
+
+    @http_client.setter
+    def http_client(self, client: httpx.AsyncClient):
+        self._http_client = client
+
+    @classmethod
+    def shared_http_client(cls) -> httpx.AsyncClient:
+        """
+        Return the running event loop's shared HTTP client
+
+        An httpx client is bound to the loop it first ran on, so each loop
+        gets its own, created on first use and closed when that loop shuts
+        down (e.g. at the end of asyncio.run()).
+        """
+        loop = asyncio.get_running_loop()
+        client = _shared_http_clients.get(loop)
+        if client is None or client.is_closed:
+            for stale in [stale for stale in _shared_http_clients if stale.is_closed()]:
+                del _shared_http_clients[stale]
+                _shared_http_closers.pop(stale, None)
+            client = _shared_http_clients[loop] = _new_http_client()
+            if loop not in _shared_http_closers:
+                _shared_http_closers[loop] = loop.create_task(_close_shared_http_client(loop))
+        return client
+
     async def close(self):
-        """Close HTTP client connection"""
-        await self.http_client.aclose()
+        """Close HTTP client connection (shared clients are left open)"""
+        if self._warmup_task is not None and not self._warmup_task.done():
+            self._warmup_task.cancel()
+        if self._blockhash_updater_running:
+            get_blockhash_cache(self.rpc_url).stop()
+            self._blockhash_updater_running = False
+        self._price_cache.stop()
+        if self._http_client is not None and not self.shared_http:
+            await self._http_client.aclose()
 
     async def __aenter__(self):
-        """Async context manager support"""
+        """Async context manager support (starts warming the API connection)"""
+        self._warmup_task = asyncio.create_task(self._prewarm())
+        if self.keypair and self.blockhash_refresh_interval and not self._blockhash_updater_running:
+            get_blockhash_cache(self.rpc_url).start(self.blockhash_refresh_interval)
+            self._blockhash_updater_running = True
+        if self.keypair and self.price_refresh_interval:
+            self._price_cache.start(self.price_refresh_interval)
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
@@ -0,0 +1,115 @@
+"""
+Exception types raised by the Tetto SDK
+
+All SDK errors derive from TettoError, so ``except TettoError`` catches
+everything the SDK raises on purpose.
+"""
+
+from typing import Optional
+
+
+class TettoError(Exception):
+    """Base class for Tetto SDK errors"""
+
+
+class TettoTransactionError(TettoError):
+    """
+    Base class for errors about a payment transaction that was sent
+
+    Attributes:
+        tx_signature: Signature of the payment transaction
+    """
+
+    def __init__(self, message: str, tx_signature: str):
+        super().__init__(message)
+        self.tx_signature = tx_signature
+
+
+class TettoTransactionFailedError(TettoTransactionError):
+    """
+    Payment transaction failed on-chain, so nothing was transferred
+
+    Only the network fee was charged; paying again is safe.
+    """
+
+
+class TettoPaymentUnconfirmedError(TettoTransactionError):
+    """
+    Payment transaction was sent but its outcome is unknown
+
+    Raised when confirmation times out or the RPC fails while sending or
+    checking. The transaction may still land: look up tx_signature before
+    paying again.
+    """
+
+
+class TettoAPIError(TettoError):
+    """
+    Tetto API returned an error
+
+    Attributes:
+        status_code: HTTP status code (None if no response was received)
+        error_code: Machine-readable ``error_code`` from the API, if any
+    """
+
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        error_code: Optional[str] = None,
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.error_code = error_code
+
+
+class TettoValidationError(TettoAPIError):
+    """Request was rejected as invalid (bad input, unknown agent, etc.)"""
+
+
+class TettoInsufficientFundsError(TettoAPIError):
+    """Paying wallet does not hold enough funds for the call"""
+
+
+class TettoPaymentSentError(TettoAPIError):
+    """
+    Agent call failed after its payment was already sent on-chain
+
+    Not safe to retry blindly: calling the agent again pays again. Use
+    tx_signature to reconcile the payment.
+
+    Attributes:
+        tx_signature: Signature of the payment transaction
+    """
+
+    def __init__(
+        self,
+        message: str,
+        tx_signature: str,
+        status_code: Optional[int] = None,
+        error_code: Optional[str] = None,
+    ):
+        super().__init__(message, status_code=status_code, error_code=error_code)
+        self.tx_signature = tx_signature
+
+
+class TettoTransientError(TettoAPIError):
+    """
+    Temporary failure (timeout, connection error, 429/502/503/504) that is safe to retry
+
+    call_agent() never raises this once the payment has been sent (see
+    TettoPaymentSentError).
+
+    Attributes:
+        retry_after: Seconds the server asked us to wait, if it said
+    """
+
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        error_code: Optional[str] = None,
+        retry_after: Optional[float] = None,
+    ):
+        super().__init__(message, status_code=status_code, error_code=error_code)
+        self.retry_after = retry_after
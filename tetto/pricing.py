@@ -0,0 +1,96 @@
+"""
+SOL/USD price cache for SOL-denominated payments
+
+Keeps the latest price in memory so pricing a payment is a local lookup
+instead of an HTTP request on the payment path.
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+
+from .exceptions import TettoError
+
+
+# Cached prices older than this are refetched before use
+PRICE_MAX_AGE = 60.0
+
+# If a refetch fails, a cached price up to this old may still be used
+PRICE_STALE_LIMIT = 300.0
+
+
+class PriceCache:
+    """
+    Latest SOL/USD price, optionally refreshed by a background task
+
+    Args:
+        fetch: Coroutine function returning the current SOL price in USD
+        max_age: Seconds a cached price is used before refetching
+        stale_limit: Oldest cached price (seconds) used when a refetch fails
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[float]],
+        max_age: float = PRICE_MAX_AGE,
+        stale_limit: float = PRICE_STALE_LIMIT,
+    ):
+        self._fetch = fetch
+        self.max_age = max_age
+        self.stale_limit = stale_limit
+        self._price: Optional[float] = None
+        self._fetched_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self) -> Optional[float]:
+        """Return the cached price, or None if missing or stale"""
+        if self._price is not None and time.monotonic() - self._fetched_at < self.max_age:
+            return self._price
+        return None
+
+    async def refresh(self) -> float:
+        """Fetch the price and cache it"""
+        price = await self._fetch()
+        self._price = price
+        self._fetched_at = time.monotonic()
+        return price
+
+    async def latest(self) -> float:
+        """
+        Return a fresh price, fetching inline when the cache is stale
+
+        If the fetch fails, the last known price is used while it is at
+        most stale_limit seconds old.
+
+        Raises:
+            TettoError: If no sufficiently recent price is available
+        """
+        price = self.get()
+        if price is not None:
+            return price
+        try:
+            return await self.refresh()
+        except TettoError as e:
+            if self._price is not None and time.monotonic() - self._fetched_at < self.stale_limit:
+                return self._price
+            raise TettoError(f"SOL/USD price unavailable: {e}") from e
+
+    def start(self, interval: float = 10.0):
+        """Start refreshing every interval seconds in the background"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(interval))
+
+    def stop(self):
+        """Stop the background refresh task"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self, interval: float):
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                # Keep the updater alive; latest() falls back to an inline fetch
+                pass
+            await asyncio.sleep(interval)
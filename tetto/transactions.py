@@ -4,180 +4,1094 @@ Solana transaction building for Tetto payments
 Handles USDC (primary) and SOL payments with automatic fee splitting.
 """
 
+import asyncio
+import functools
+import logging
+from decimal import ROUND_HALF_EVEN, Decimal
+import struct
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit, urlunsplit
+import websockets
+from solders.hash import Hash
 from solders.keypair import Keypair
 from solders.pubkey import Pubkey
+from solders.signature import Signature
+from solders.transaction_status import TransactionConfirmationStatus
 from solders.system_program import TransferParams, transfer
 from solders.transaction import Transaction
 from solders.message import Message
 from solders.instruction import Instruction, AccountMeta
 from solana.rpc.async_api import AsyncClient
 from solana.rpc.commitment import Confirmed
-import struct
+from solana.exceptions import SolanaRpcException
+from solana.rpc.core import RPCException
+
+try:
+    from solana.rpc.types import TxOpts
+except ImportError:  # solana-py >= 0.41 moved it
+    from solana.rpc.models import TxOpts
+
+from ._json import dumps, loads
+from .exceptions import TettoError, TettoPaymentUnconfirmedError, TettoTransactionFailedError
 
 
+logger = logging.getLogger("tetto.transactions")
+
 # SPL Token Program ID
 TOKEN_PROGRAM_ID = Pubkey.from_string("TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA")
+TOKEN_PROGRAM_ID_BYTES = bytes(TOKEN_PROGRAM_ID)
+
+# Associated Token Program ID
+ASSOCIATED_TOKEN_PROGRAM_ID = Pubkey.from_string("ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8knL")
+
+# SPL Token TransferChecked instruction: discriminator (12), amount (u64), decimals (u8)
+TRANSFER_CHECKED_IX = 12
+_TRANSFER_CHECKED = struct.Struct("<BQB")
+
+# SPL Token Transfer instruction: discriminator (3), amount (u64)
+TRANSFER_IX = 3
+_TRANSFER = struct.Struct("<BQ")
+
+# Base-unit decimals: 1 USDC = 10**6, 1 SOL = 10**9 lamports
+USDC_DECIMALS = 6
+SOL_DECIMALS = 9
+
+# Parsed mint pubkeys: base58 string -> Pubkey
+_MINT_CACHE: Dict[str, Pubkey] = {}
+
+# ATA bump seeds: (wallet bytes, mint bytes) -> (bump, ATA), oldest first
+_ATA_BUMPS: Dict[Tuple[bytes, bytes], Tuple[int, Pubkey]] = {}
+
+# Upper bound on remembered ATA bumps (oldest are dropped first)
+ATA_BUMPS_MAXSIZE = 4096
+
+# Default file for load_ata_cache() / save_ata_cache()
+ATA_CACHE_PATH = "~/.tetto/ata_cache.json"
+
+# Shared RPC clients: (event loop, rpc_url) -> client
+_clients: Dict[Tuple[asyncio.AbstractEventLoop, str], AsyncClient] = {}
+
+# Shared PubSub connections: (event loop, ws_url) -> subscriber
+_subscribers: Dict[Tuple[asyncio.AbstractEventLoop, str], "_SignatureSubscriber"] = {}
+
+# Per-loop tasks that close that loop's clients when it shuts down
+_closers: Dict[asyncio.AbstractEventLoop, asyncio.Task] = {}
+
+# Cached blockhashes older than this are refetched before use (valid ~60s)
+BLOCKHASH_MAX_AGE = 20.0
+
+# How long a signed message is remembered to avoid resending an identical tx
+BLOCKHASH_LIFETIME = 90.0
+
+# Give up waiting for confirmation after this long (blockhash has expired by then)
+CONFIRM_TIMEOUT = 90.0
+CONFIRM_POLL_INTERVAL = 0.5
+
+# signatureSubscribe: give up on the WebSocket if the subscription is not
+# acknowledged this fast, and check getSignatureStatuses this often while
+# waiting in case the notification is missed
+WS_ACK_TIMEOUT = 5.0
+WS_STATUS_CHECK_INTERVAL = 3.0
+
+# getSignatureStatuses accepts at most this many signatures per request
+MAX_SIGNATURE_STATUSES = 256
+
+# send_many() submits at most this many transactions concurrently
+SEND_BATCH_SIZE = 20
 
 
 def get_associated_token_address(wallet: Pubkey, mint: Pubkey) -> Pubkey:
     """
     Derive Associated Token Account (ATA) address
     
-    This is deterministic - same wallet + mint = same ATA
+    This is deterministic - same wallet + mint = same ATA, so results are
+    memoized (find_program_address hashes until it finds an off-curve PDA).
     """
-    from solders.sysvar import SYSVAR_RENT_PUBKEY
-    from solders.pubkey import Pubkey as PubkeyClass
-    
-    # Associated Token Program ID
-    ASSOCIATED_TOKEN_PROGRAM_ID = Pubkey.from_string("ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8knL")
+    return _ata_cached(bytes(wallet), bytes(mint))
+
+
+@functools.lru_cache(maxsize=1024)
+def _account_meta(pubkey: Pubkey, is_signer: bool, is_writable: bool) -> AccountMeta:
+    """
+    Shared AccountMeta for an account
+
+    AccountMeta is immutable, so the metas that repeat on every payment
+    (payer ATA, mint, signer, protocol ATA) are built once and reused.
+    """
+    return AccountMeta(pubkey=pubkey, is_signer=is_signer, is_writable=is_writable)
+
+
+def _decimal(value: Union[float, Decimal]) -> Decimal:
+    """Exact decimal for a price; floats go through str() so 0.01 stays 0.01"""
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def _to_base_units(amount: Decimal, decimals: int) -> int:
+    """Scale a token amount to integer base units with banker's rounding"""
+    return int(amount.scaleb(decimals).to_integral_value(rounding=ROUND_HALF_EVEN))
+
+
+def _fee_bps(fee_bps: Union[int, float]) -> int:
+    """Validate a protocol fee in basis points: a whole number from 0 to 10000"""
+    bps = int(fee_bps)
+    if bps != fee_bps or not 0 <= bps <= 10000:
+        raise ValueError(f"fee_bps must be a whole number from 0 to 10000, got {fee_bps!r}")
+    return bps
+
+
+def _mint(mint: Union[str, Pubkey]) -> Pubkey:
+    """Parse a mint address once per process (Pubkeys pass through)"""
+    if isinstance(mint, Pubkey):
+        return mint
+    pubkey = _MINT_CACHE.get(mint)
+    if pubkey is None:
+        pubkey = _MINT_CACHE[mint] = Pubkey.from_string(mint)
+    return pubkey
+
+
+@functools.lru_cache(maxsize=4096)
+def _ata_cached(wallet_bytes: bytes, mint_bytes: bytes) -> Pubkey:
+    # A loaded entry was verified against its bump, so no hashing is needed
+    known = _ATA_BUMPS.get((wallet_bytes, mint_bytes))
+    if known is not None:
+        return known[1]
     
     # Find PDA: [wallet, TOKEN_PROGRAM_ID, mint]
     seeds = [
-        bytes(wallet),
-        bytes(TOKEN_PROGRAM_ID),
-        bytes(mint),
+        wallet_bytes,
+        TOKEN_PROGRAM_ID_BYTES,
+        mint_bytes,
     ]
-    
-    pda, _ = Pubkey.find_program_address(seeds, ASSOCIATED_TOKEN_PROGRAM_ID)
+    pda, bump = Pubkey.find_program_address(seeds, ASSOCIATED_TOKEN_PROGRAM_ID)
+    _remember_ata(wallet_bytes, mint_bytes, bump, pda)
     return pda
 
 
-async def build_and_send_payment(
+def _remember_ata(wallet_bytes: bytes, mint_bytes: bytes, bump: int, ata: Pubkey):
+    """Record a derived ATA and its bump, dropping the oldest past ATA_BUMPS_MAXSIZE"""
+    _ATA_BUMPS[(wallet_bytes, mint_bytes)] = (bump, ata)
+    while len(_ATA_BUMPS) > ATA_BUMPS_MAXSIZE:
+        del _ATA_BUMPS[next(iter(_ATA_BUMPS))]
+
+
+def load_ata_cache(path: Union[str, Path] = ATA_CACHE_PATH) -> int:
+    """
+    Load ATAs saved by save_ata_cache()
+
+    Each entry holds the ATA and its bump seed. The ATA is checked with one
+    create_program_address hash instead of the find_program_address search,
+    and later derivations for that (wallet, mint) pair reuse it. A missing
+    file is not an error.
+
+    Returns:
+        Number of entries loaded
+
+    Raises:
+        ValueError: If an entry is malformed or its bump does not derive
+            its ATA
+    """
+    path = Path(path).expanduser()
+    if not path.exists():
+        return 0
+    
+    with open(path, "rb") as f:
+        entries = loads(f.read())
+    
+    for key, entry in entries.items():
+        try:
+            wallet, mint = (Pubkey.from_string(part) for part in key.split(":"))
+            bump, ata = entry["bump"], Pubkey.from_string(entry["ata"])
+        except (ValueError, TypeError, KeyError) as e:
+            raise ValueError(f"Invalid ATA cache entry for {key}: {entry!r}") from e
+        if isinstance(bump, bool) or not isinstance(bump, int) or not 0 <= bump <= 255:
+            raise ValueError(f"Invalid ATA bump for {key}: {bump!r}")
+        seeds = [bytes(wallet), TOKEN_PROGRAM_ID_BYTES, bytes(mint), bytes([bump])]
+        try:
+            derived = Pubkey.create_program_address(seeds, ASSOCIATED_TOKEN_PROGRAM_ID)
+        except Exception:
+            derived = None
+        if derived != ata:
+            raise ValueError(f"ATA bump {bump} for {key} does not derive {ata}")
+        _remember_ata(bytes(wallet), bytes(mint), bump, ata)
+    return len(entries)
+
+
+def save_ata_cache(path: Union[str, Path] = ATA_CACHE_PATH):
+    """Save the ATAs derived so far with their bump seeds (see load_ata_cache)"""
+    path = Path(path).expanduser()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    entries = {
+        f"{Pubkey.from_bytes(wallet)}:{Pubkey.from_bytes(mint)}": {"bump": bump, "ata": str(ata)}
+        for (wallet, mint), (bump, ata) in _ATA_BUMPS.items()
+    }
+    with open(path, "wb") as f:
+        f.write(dumps(entries))
+
+
+def _get_client(rpc_url: str) -> AsyncClient:
+    """
+    Return the shared RPC client for rpc_url, creating it on first use
+
+    Reusing one client keeps its connection pool (and TLS session) alive
+    across payments. A client is bound to the event loop that created it,
+    so each loop gets its own, closed when that loop shuts down.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get((loop, rpc_url))
+    if client is None:
+        _discard_stale_clients()
+        client = _clients[(loop, rpc_url)] = AsyncClient(rpc_url)
+        _ensure_closer(loop)
+    return client
+
+
+def _get_subscriber(ws_url: str) -> "_SignatureSubscriber":
+    """Return the shared PubSub connection for ws_url on the running loop"""
+    loop = asyncio.get_running_loop()
+    subscriber = _subscribers.get((loop, ws_url))
+    if subscriber is None:
+        _discard_stale_clients()
+        subscriber = _subscribers[(loop, ws_url)] = _SignatureSubscriber(ws_url)
+        _ensure_closer(loop)
+    return subscriber
+
+
+def _ensure_closer(loop: asyncio.AbstractEventLoop):
+    """Make sure loop's shared clients are closed when it shuts down"""
+    if loop not in _closers:
+        _closers[loop] = loop.create_task(_close_on_shutdown(loop))
+
+
+def _discard_stale_clients():
+    """Forget clients whose event loop is already closed"""
+    for key in [key for key in _clients if key[0].is_closed()]:
+        del _clients[key]
+    for key in [key for key in _subscribers if key[0].is_closed()]:
+        del _subscribers[key]
+    for loop in [loop for loop in _closers if loop.is_closed()]:
+        del _closers[loop]
+
+
+async def _close_loop_clients(loop: asyncio.AbstractEventLoop):
+    """Close every shared client created on loop"""
+    for key in [key for key in _clients if key[0] is loop]:
+        client = _clients.pop(key)
+        try:
+            await client.close()
+        except Exception:
+            pass
+    for key in [key for key in _subscribers if key[0] is loop]:
+        await _subscribers.pop(key).close()
+
+
+async def _close_on_shutdown(loop: asyncio.AbstractEventLoop):
+    """
+    Idle until cancelled, then close loop's clients
+
+    asyncio.run() cancels leftover tasks before closing the loop, so the
+    clients are closed while their loop can still run the cleanup.
+    """
+    try:
+        await loop.create_future()
+    except asyncio.CancelledError:
+        _closers.pop(loop, None)
+        await _close_loop_clients(loop)
+        raise
+
+
+async def close_rpc_clients():
+    """Close the shared RPC clients (and PubSub connections) of the running loop"""
+    loop = asyncio.get_running_loop()
+    closer = _closers.pop(loop, None)
+    if closer is not None:
+        closer.cancel()
+    await _close_loop_clients(loop)
+    _discard_stale_clients()
+
+
+class BlockhashCache:
+    """
+    Recent blockhash for one RPC endpoint, shared by all payments
+
+    latest() returns the cached blockhash while it is younger than max_age
+    and fetches a new one otherwise. start() keeps it fresh from a
+    background task so payments never wait on the RPC for it.
+
+    Because payments reuse a blockhash, two identical payments (same payer,
+    recipients and amounts) would produce byte-identical transactions.
+    claim() lets the builder detect that and move to a newer blockhash.
+    """
+
+    def __init__(self, rpc_url: str, max_age: float = BLOCKHASH_MAX_AGE):
+        self.rpc_url = rpc_url
+        self.max_age = max_age
+        self._blockhash: Optional[Hash] = None
+        self._fetched_at = 0.0
+        self._sent: Dict[bytes, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._users = 0
+
+    def get(self) -> Optional[Hash]:
+        """Return the cached blockhash, or None if missing or stale"""
+        if self._blockhash is not None and time.monotonic() - self._fetched_at < self.max_age:
+            return self._blockhash
+        return None
+
+    async def refresh(self, newer_than: Optional[Hash] = None) -> Hash:
+        """
+        Fetch a blockhash from the RPC and cache it
+
+        With newer_than, keep polling until the RPC returns a different one
+        (a new slot is produced every ~400ms).
+        """
+        client = _get_client(self.rpc_url)
+        deadline = time.monotonic() + 10.0
+        while True:
+            resp = await client.get_latest_blockhash(commitment=Confirmed)
+            blockhash = resp.value.blockhash
+            if newer_than is None or blockhash != newer_than:
+                break
+            if time.monotonic() > deadline:
+                raise TimeoutError("RPC did not return a new blockhash within 10s")
+            await asyncio.sleep(0.2)
+
+        self._blockhash = blockhash
+        self._fetched_at = time.monotonic()
+        return blockhash
+
+    async def latest(self) -> Hash:
+        """Return a fresh cached blockhash, fetching one if needed"""
+        return self.get() or await self.refresh()
+
+    def claim(self, message_bytes: bytes) -> bool:
+        """
+        Record a message about to be signed and sent
+
+        Returns False if the identical message was already sent recently,
+        in which case the caller must rebuild it with a newer blockhash.
+        """
+        now = time.monotonic()
+        while self._sent:
+            oldest = next(iter(self._sent))
+            if now - self._sent[oldest] < BLOCKHASH_LIFETIME:
+                break
+            del self._sent[oldest]
+
+        if message_bytes in self._sent:
+            return False
+        self._sent[message_bytes] = now
+        return True
+
+    def start(self, interval: float = 2.0):
+        """Start refreshing in the background (reference counted)"""
+        self._users += 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(interval))
+
+    def stop(self):
+        """Release one start(); the task stops when no users remain"""
+        self._users = max(0, self._users - 1)
+        if self._users == 0 and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self, interval: float):
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                # Keep the updater alive; latest() falls back to a live fetch
+                pass
+            await asyncio.sleep(interval)
+
+
+def _debug(debug: bool, msg: str, *args):
+    """Print progress when this call has debug=True, else log it at DEBUG"""
+    if debug:
+        print(msg % args)
+    else:
+        logger.debug(msg, *args)
+
+
+def websocket_url(rpc_url: str) -> str:
+    """
+    Derive the PubSub WebSocket URL for an HTTP RPC URL
+
+    Same convention as @solana/web3.js: http(s) becomes ws(s), and an
+    explicit port is incremented by one (8899 -> 8900 for a local validator).
+    """
+    parts = urlsplit(rpc_url)
+    scheme = "wss" if parts.scheme == "https" else "ws"
+    netloc = parts.netloc
+    if parts.port is not None:
+        netloc = f"{parts.hostname}:{parts.port + 1}"
+    return urlunsplit((scheme, netloc, parts.path, parts.query, parts.fragment))
+
+
+class _SignatureSubscriber:
+    """
+    One PubSub WebSocket shared by every signatureSubscribe on a loop
+
+    Payments reuse the open connection instead of paying for a new
+    WebSocket (and TLS) handshake each. A reader task routes each
+    subscription acknowledgement and notification to its waiter; if the
+    connection drops, every waiter fails and the next subscribe()
+    reconnects.
+    """
+
+    def __init__(self, ws_url: str):
+        self.ws_url = ws_url
+        self._ws = None
+        self._reader: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._next_id = 0
+        # request id -> future for (ack message, notification future)
+        self._acks: Dict[int, asyncio.Future] = {}
+        # subscription id -> future for the notification's value
+        self._notifications: Dict[int, asyncio.Future] = {}
+
+    async def _connect(self, timeout: float):
+        async with self._lock:
+            if self._ws is None:
+                self._ws = await asyncio.wait_for(websockets.connect(self.ws_url), timeout)
+                self._reader = asyncio.create_task(self._read(self._ws))
+            return self._ws
+
+    async def _read(self, ws):
+        loop = asyncio.get_running_loop()
+        try:
+            async for raw in ws:
+                message = loads(raw)
+                if "id" in message:
+                    ack = self._acks.pop(message["id"], None)
+                    if ack is None or ack.done():
+                        continue
+                    # Register before the notification can arrive
+                    notification = loop.create_future()
+                    if "error" not in message:
+                        self._notifications[message["result"]] = notification
+                    ack.set_result((message, notification))
+                elif message.get("method") == "signatureNotification":
+                    params = message["params"]
+                    notification = self._notifications.pop(params["subscription"], None)
+                    if notification is not None and not notification.done():
+                        notification.set_result(params["result"]["value"])
+        except Exception as e:
+            logger.debug("PubSub connection to %s lost: %r", self.ws_url, e)
+        finally:
+            if self._ws is ws:
+                self._ws = None
+            error = ConnectionError("PubSub WebSocket closed")
+            for waiter in [*self._acks.values(), *self._notifications.values()]:
+                if not waiter.done():
+                    waiter.set_exception(error)
+            self._acks.clear()
+            self._notifications.clear()
+
+    async def subscribe(self, signature: str, timeout: float) -> Tuple[int, asyncio.Future]:
+        """
+        Subscribe to signature at confirmed commitment
+
+        Returns the subscription id and a future resolving to the
+        notification's value. Raises ConnectionError (or TimeoutError) if
+        the WebSocket is unusable or the request is not acknowledged
+        within timeout.
+        """
+        deadline = time.monotonic() + timeout
+        ws = await self._connect(timeout)
+        self._next_id += 1
+        request_id = self._next_id
+        ack = asyncio.get_running_loop().create_future()
+        self._acks[request_id] = ack
+        try:
+            await ws.send(dumps({
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "method": "signatureSubscribe",
+                "params": [signature, {"commitment": "confirmed"}],
+            }).decode("utf-8"))
+            message, notification = await asyncio.wait_for(ack, deadline - time.monotonic())
+        finally:
+            self._acks.pop(request_id, None)
+        if "error" in message:
+            raise ConnectionError(f"signatureSubscribe rejected: {message['error']}")
+        return message["result"], notification
+
+    async def unsubscribe(self, subscription: int):
+        """Drop a subscription that is no longer awaited (best effort)"""
+        if self._notifications.pop(subscription, None) is None or self._ws is None:
+            return
+        self._next_id += 1
+        try:
+            await self._ws.send(dumps({
+                "jsonrpc": "2.0",
+                "id": self._next_id,
+                "method": "signatureUnsubscribe",
+                "params": [subscription],
+            }).decode("utf-8"))
+        except Exception:
+            pass
+
+    async def close(self):
+        ws, self._ws = self._ws, None
+        if ws is not None:
+            try:
+                await ws.close()
+            except Exception:
+                pass
+        if self._reader is not None:
+            self._reader.cancel()
+
+
+def _check_status(signature: str, status) -> bool:
+    """True if status shows the tx confirmed; raises if it failed on-chain"""
+    if status is None:
+        return False
+    if status.err is not None:
+        raise TettoTransactionFailedError(
+            f"Transaction {signature} failed: {status.err}",
+            tx_signature=signature,
+        )
+    return status.confirmation_status in (
+        TransactionConfirmationStatus.Confirmed,
+        TransactionConfirmationStatus.Finalized,
+    )
+
+
+async def _poll_confirmation(client: AsyncClient, signature: str, deadline: float):
+    """Poll getSignatureStatuses (recent status cache only) until confirmed"""
+    sig = Signature.from_string(signature)
+    while True:
+        resp = await client.get_signature_statuses([sig])
+        if _check_status(signature, resp.value[0]):
+            return
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Transaction {signature} not confirmed after {CONFIRM_TIMEOUT:.0f}s")
+        await asyncio.sleep(CONFIRM_POLL_INTERVAL)
+
+
+async def _subscribe_confirmation(
+    client: AsyncClient,
+    ws_url: str,
+    signature: str,
+    deadline: float,
+):
+    """
+    Wait for a signatureSubscribe notification at confirmed commitment
+
+    The subscription must be acknowledged within WS_ACK_TIMEOUT. While
+    waiting for the notification, getSignatureStatuses is checked every
+    WS_STATUS_CHECK_INTERVAL seconds, so a missed notification costs at
+    most one interval.
+    """
+    subscriber = _get_subscriber(ws_url)
+    subscription, notification = await subscriber.subscribe(
+        signature, min(WS_ACK_TIMEOUT, deadline - time.monotonic())
+    )
+    sig = Signature.from_string(signature)
+    try:
+        while True:
+            # Also covers a tx that confirmed before the subscription was registered
+            try:
+                resp = await client.get_signature_statuses([sig])
+            except (RPCException, SolanaRpcException, OSError) as e:
+                logger.debug("getSignatureStatuses failed: %r", e)
+            else:
+                if _check_status(signature, resp.value[0]):
+                    return
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Transaction {signature} not confirmed after {CONFIRM_TIMEOUT:.0f}s")
+            try:
+                value = await asyncio.wait_for(
+                    asyncio.shield(notification), min(WS_STATUS_CHECK_INTERVAL, remaining)
+                )
+            except asyncio.TimeoutError:
+                continue
+            err = value.get("err")
+            if err is not None:
+                raise TettoTransactionFailedError(
+                    f"Transaction {signature} failed: {err}",
+                    tx_signature=signature,
+                )
+            return
+    finally:
+        if not notification.done():
+            await subscriber.unsubscribe(subscription)
+
+
+async def confirm_signature(
     rpc_url: str,
-    payer_keypair: Keypair,
+    signature: str,
+    ws_url: Optional[str] = None,
+    debug: bool = False,
+):
+    """
+    Wait until a transaction reaches confirmed commitment
+
+    Use this to confirm later when a payment was sent with
+    build_and_send_payment(..., wait_for_confirmation=False).
+
+    Uses a signatureSubscribe on the loop's shared PubSub WebSocket instead
+    of rapid status polls, checking getSignatureStatuses every
+    WS_STATUS_CHECK_INTERVAL seconds in case the notification is missed.
+    If the WebSocket cannot be used, falls back to polling
+    getSignatureStatuses without searching transaction history.
+
+    Raises:
+        TettoTransactionFailedError: If the transaction failed on-chain
+        TettoPaymentUnconfirmedError: If it is not confirmed within
+            CONFIRM_TIMEOUT seconds, or the RPC fails while checking
+    """
+    client = _get_client(rpc_url)
+    deadline = time.monotonic() + CONFIRM_TIMEOUT
+    try:
+        try:
+            await _subscribe_confirmation(client, ws_url or websocket_url(rpc_url), signature, deadline)
+            return
+        except (OSError, asyncio.TimeoutError, websockets.WebSocketException, ConnectionError) as e:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Transaction {signature} not confirmed after {CONFIRM_TIMEOUT:.0f}s") from e
+            _debug(debug, "   ⚠️  WebSocket confirmation unavailable (%r), polling instead", e)
+
+        await _poll_confirmation(client, signature, deadline)
+    except TettoTransactionFailedError:
+        raise
+    except Exception as e:
+        raise TettoPaymentUnconfirmedError(
+            f"Transaction {signature} was sent but not confirmed: {e}",
+            tx_signature=signature,
+        ) from e
+
+
+async def _confirm_all(
+    client: AsyncClient,
+    signatures: List[str],
+    deadline: float,
+) -> Dict[str, BaseException]:
+    """
+    Poll getSignatureStatuses until every signature is confirmed or failed
+
+    Returns an error for each signature that failed on-chain or was still
+    unconfirmed at deadline; confirmed signatures are absent. A failed
+    status request (rate limit, transport error) is retried on the next
+    poll rather than raised, so no signature is lost.
+    """
+    errors: Dict[str, BaseException] = {}
+    poll_errors: Dict[str, BaseException] = {}
+    pending = list(signatures)
+    while pending:
+        still_pending = []
+        for start in range(0, len(pending), MAX_SIGNATURE_STATUSES):
+            chunk = pending[start:start + MAX_SIGNATURE_STATUSES]
+            try:
+                resp = await client.get_signature_statuses([Signature.from_string(s) for s in chunk])
+            except Exception as e:
+                logger.debug("getSignatureStatuses failed: %r", e)
+                still_pending.extend(chunk)
+                poll_errors.update(dict.fromkeys(chunk, e))
+                continue
+            for signature, status in zip(chunk, resp.value):
+                poll_errors.pop(signature, None)
+                try:
+                    if not _check_status(signature, status):
+                        still_pending.append(signature)
+                except TettoTransactionFailedError as e:
+                    errors[signature] = e
+        pending = still_pending
+        if not pending:
+            break
+        if time.monotonic() > deadline:
+            for signature in pending:
+                cause = poll_errors.get(signature)
+                reason = f" (last status check failed: {cause!r})" if cause else ""
+                error = TettoPaymentUnconfirmedError(
+                    f"Transaction {signature} not confirmed after {CONFIRM_TIMEOUT:.0f}s{reason}",
+                    tx_signature=signature,
+                )
+                error.__cause__ = cause
+                errors[signature] = error
+            break
+        await asyncio.sleep(CONFIRM_POLL_INTERVAL)
+    return errors
+
+
+async def confirm_signatures(rpc_url: str, signatures: List[str]):
+    """
+    Wait until every transaction in signatures reaches confirmed commitment
+
+    Polls getSignatureStatuses for all outstanding signatures at once
+    (MAX_SIGNATURE_STATUSES per request) instead of confirming each
+    transaction separately.
+
+    Raises:
+        TettoTransactionFailedError: If any transaction failed on-chain
+        TettoPaymentUnconfirmedError: If they are not all confirmed within
+            CONFIRM_TIMEOUT seconds
+    """
+    client = _get_client(rpc_url)
+    errors = await _confirm_all(client, signatures, time.monotonic() + CONFIRM_TIMEOUT)
+    if errors:
+        raise next(iter(errors.values()))
+
+
+# Blockhash caches: rpc_url -> cache
+_blockhash_caches: Dict[str, BlockhashCache] = {}
+
+
+def get_blockhash_cache(rpc_url: str) -> BlockhashCache:
+    """Return the shared BlockhashCache for rpc_url"""
+    cache = _blockhash_caches.get(rpc_url)
+    if cache is None:
+        cache = _blockhash_caches[rpc_url] = BlockhashCache(rpc_url)
+    return cache
+
+
+async def get_recent_blockhash(rpc_url: str) -> Hash:
+    """
+    Get a recent blockhash for signing a payment
+
+    Served from the shared BlockhashCache when it is fresh. Exposed
+    separately so callers can fetch it concurrently with other work and
+    pass it to build_and_send_payment().
+    """
+    return await get_blockhash_cache(rpc_url).latest()
+
+
+def _payment_instructions(
+    payer: Pubkey,
     agent_wallet: Pubkey,
     protocol_wallet: Pubkey,
-    price_usd: float,
+    price_usd: Union[float, Decimal],
     token: str = "USDC",
-    usdc_mint: str = "",
+    usdc_mint: Union[str, Pubkey] = "",
     fee_bps: int = 1000,
+    use_transfer_checked: bool = True,
+    sol_price: Optional[float] = None,
+    payer_ata: Optional[Pubkey] = None,
+    protocol_ata: Optional[Pubkey] = None,
     debug: bool = False,
-) -> str:
-    """
-    Build, sign, and send payment transaction
-    
-    Supports USDC (primary) and SOL.
-    """
-    async with AsyncClient(rpc_url) as client:
-        if token == "USDC":
-            # USDC: 1 USD = 1 USDC (6 decimals)
-            amount_base = int(price_usd * 1_000_000)
-            
-            # Calculate fees
-            protocol_fee = int(amount_base * fee_bps / 10000)
-            agent_amount = amount_base - protocol_fee
-            
-            if debug:
-                print(f"💰 ${price_usd} USD = {amount_base} USDC base units")
-                print(f"   Agent: {agent_amount}, Protocol: {protocol_fee}")
-            
-            # Get mint pubkey
-            mint_pubkey = Pubkey.from_string(usdc_mint)
-            
-            # Derive ATAs
-            payer_ata = get_associated_token_address(payer_keypair.pubkey(), mint_pubkey)
-            agent_ata = get_associated_token_address(agent_wallet, mint_pubkey)
+) -> List[Instruction]:
+    """Build the agent + protocol fee transfer instructions for one payment"""
+    # A float fee_bps (e.g. 1000.0 from JSON) would make every amount a float
+    fee_bps = _fee_bps(fee_bps)
+    if token == "USDC":
+        # USDC: 1 USD = 1 USDC (6 decimals)
+        amount_base = _to_base_units(_decimal(price_usd), USDC_DECIMALS)
+        
+        # Calculate fees (integer math; the fee rounds down, the agent keeps the rest)
+        protocol_fee = amount_base * fee_bps // 10000
+        agent_amount = amount_base - protocol_fee
+        
+        _debug(debug, "💰 $%s USD = %s USDC base units", price_usd, amount_base)
+        _debug(debug, "   Agent: %s, Protocol: %s", agent_amount, protocol_fee)
+        
+        # Get mint pubkey
+        mint_pubkey = _mint(usdc_mint)
+        
+        # Derive ATAs (unless the caller already has them)
+        if payer_ata is None:
+            payer_ata = get_associated_token_address(payer, mint_pubkey)
+        agent_ata = get_associated_token_address(agent_wallet, mint_pubkey)
+        if protocol_ata is None:
             protocol_ata = get_associated_token_address(protocol_wallet, mint_pubkey)
-            
-            if debug:
-                print(f"📋 Token Accounts:")
-                print(f"   Payer ATA: {payer_ata}")
-                print(f"   Agent ATA: {agent_ata}")
-                print(f"   Protocol ATA: {protocol_ata}")
-            
-            # Get recent blockhash
-            blockhash_resp = await client.get_latest_blockhash()
-            recent_blockhash = blockhash_resp.value.blockhash
-            
-            # Build SPL Token transfer instructions
-            # TransferChecked instruction (safer than Transfer)
-            
-            # Transfer to agent
-            transfer_to_agent_ix = Instruction(
+        
+        _debug(debug, "📋 Token Accounts:")
+        _debug(debug, "   Payer ATA: %s", payer_ata)
+        _debug(debug, "   Agent ATA: %s", agent_ata)
+        _debug(debug, "   Protocol ATA: %s", protocol_ata)
+        
+        # Build SPL Token transfer instructions
+        # TransferChecked instruction (safer than Transfer); the protocol fee
+        # leg may use plain Transfer when use_transfer_checked=False
+        
+        # Source, mint, and authority accounts are shared by both legs
+        source_meta = _account_meta(payer_ata, False, True)
+        mint_meta = _account_meta(mint_pubkey, False, False)
+        authority_meta = _account_meta(payer, True, False)
+        
+        # Transfer to agent
+        transfer_to_agent_ix = Instruction(
+            program_id=TOKEN_PROGRAM_ID,
+            accounts=[
+                source_meta,
+                mint_meta,
+                _account_meta(agent_ata, False, True),
+                authority_meta,
+            ],
+            data=_TRANSFER_CHECKED.pack(TRANSFER_CHECKED_IX, agent_amount, USDC_DECIMALS),
+        )
+        
+        # Transfer to protocol
+        if use_transfer_checked:
+            transfer_to_protocol_ix = Instruction(
                 program_id=TOKEN_PROGRAM_ID,
                 accounts=[
-                    AccountMeta(pubkey=payer_ata, is_signer=False, is_writable=True),
-                    AccountMeta(pubkey=mint_pubkey, is_signer=False, is_writable=False),
-                    AccountMeta(pubkey=agent_ata, is_signer=False, is_writable=True),
-                    AccountMeta(pubkey=payer_keypair.pubkey(), is_signer=True, is_writable=False),
+                    source_meta,
+                    mint_meta,
+                    _account_meta(protocol_ata, False, True),
+                    authority_meta,
                 ],
-                data=bytes([12]) + struct.pack("<QB", agent_amount, 6),  # TransferChecked: amount, decimals
+                data=_TRANSFER_CHECKED.pack(TRANSFER_CHECKED_IX, protocol_fee, USDC_DECIMALS),
             )
-            
-            # Transfer to protocol
+        else:
+            # Plain Transfer: no mint account or decimals byte (smaller, fewer CUs)
             transfer_to_protocol_ix = Instruction(
                 program_id=TOKEN_PROGRAM_ID,
                 accounts=[
-                    AccountMeta(pubkey=payer_ata, is_signer=False, is_writable=True),
-                    AccountMeta(pubkey=mint_pubkey, is_signer=False, is_writable=False),
-                    AccountMeta(pubkey=protocol_ata, is_signer=False, is_writable=True),
-                    AccountMeta(pubkey=payer_keypair.pubkey(), is_signer=True, is_writable=False),
+                    source_meta,
+                    _account_meta(protocol_ata, False, True),
+                    authority_meta,
                 ],
-                data=bytes([12]) + struct.pack("<QB", protocol_fee, 6),
-            )
-            
-            # Build and sign transaction
-            msg = Message.new_with_blockhash(
-                [transfer_to_agent_ix, transfer_to_protocol_ix],
-                payer_keypair.pubkey(),
-                recent_blockhash,
-            )
-            tx = Transaction([payer_keypair], msg, recent_blockhash)
-            
-        else:  # SOL
-            # Convert USD to SOL (fetch from API or use estimate)
-            sol_price = 200.0  # TODO: Fetch from /api/price/sol
-            sol_amount = price_usd / sol_price
-            amount_lamports = int(sol_amount * 1e9)
-            
-            # Calculate fees
-            protocol_fee = int(amount_lamports * fee_bps / 10000)
-            agent_amount = amount_lamports - protocol_fee
-            
-            if debug:
-                print(f"💰 ${price_usd} USD = {amount_lamports} lamports (at ${sol_price}/SOL)")
-                print(f"   Agent: {agent_amount}, Protocol: {protocol_fee}")
-            
-            # Get recent blockhash
-            blockhash_resp = await client.get_latest_blockhash()
-            recent_blockhash = blockhash_resp.value.blockhash
-            
-            # Build SOL transfer instructions
-            ix1 = transfer(TransferParams(
-                from_pubkey=payer_keypair.pubkey(),
-                to_pubkey=agent_wallet,
-                lamports=agent_amount,
-            ))
-            
-            ix2 = transfer(TransferParams(
-                from_pubkey=payer_keypair.pubkey(),
-                to_pubkey=protocol_wallet,
-                lamports=protocol_fee,
-            ))
-            
-            # Build and sign transaction
-            msg = Message.new_with_blockhash(
-                [ix1, ix2],
-                payer_keypair.pubkey(),
-                recent_blockhash,
+                data=_TRANSFER.pack(TRANSFER_IX, protocol_fee),
             )
-            tx = Transaction([payer_keypair], msg, recent_blockhash)
         
-        # Send transaction
-        if debug:
-            print(f"📡 Sending transaction...")
+        instructions = [transfer_to_agent_ix, transfer_to_protocol_ix]
         
-        result = await client.send_transaction(tx)
-        signature = str(result.value)
+    else:  # SOL
+        # Convert USD to SOL (caller supplies the price; see PriceCache)
+        if sol_price is None:
+            raise ValueError("sol_price is required for SOL payments")
+        sol_amount = _decimal(price_usd) / _decimal(sol_price)
+        amount_lamports = _to_base_units(sol_amount, SOL_DECIMALS)
         
-        if debug:
-            print(f"   ✅ Transaction sent: {signature}")
-            print(f"   Waiting for confirmation...")
+        # Calculate fees (integer math; the fee rounds down, the agent keeps the rest)
+        protocol_fee = amount_lamports * fee_bps // 10000
+        agent_amount = amount_lamports - protocol_fee
         
-        # Wait for confirmation
-        await client.confirm_transaction(signature, commitment=Confirmed)
+        _debug(debug, "💰 $%s USD = %s lamports (at $%s/SOL)", price_usd, amount_lamports, sol_price)
+        _debug(debug, "   Agent: %s, Protocol: %s", agent_amount, protocol_fee)
         
-        if debug:
-            print(f"   ✅ Confirmed!")
+        # Build SOL transfer instructions
+        ix1 = transfer(TransferParams(
+            from_pubkey=payer,
+            to_pubkey=agent_wallet,
+            lamports=agent_amount,
+        ))
         
+        ix2 = transfer(TransferParams(
+            from_pubkey=payer,
+            to_pubkey=protocol_wallet,
+            lamports=protocol_fee,
+        ))
+        
+        instructions = [ix1, ix2]
+    
+    return instructions
+
+
+async def _claim_message(
+    blockhash_cache: BlockhashCache,
+    instructions: List[Instruction],
+    payer: Pubkey,
+    recent_blockhash: Hash,
+) -> Message:
+    """Compile instructions into a message no earlier payment has used"""
+    msg = Message.new_with_blockhash(instructions, payer, recent_blockhash)
+    while not blockhash_cache.claim(bytes(msg)):
+        # Same payment already sent with this blockhash; it would be a duplicate tx
+        recent_blockhash = await blockhash_cache.refresh(newer_than=recent_blockhash)
+        msg = Message.new_with_blockhash(instructions, payer, recent_blockhash)
+    return msg
+
+
+async def _send_transaction(client: AsyncClient, tx: Transaction, opts: TxOpts) -> str:
+    """
+    Submit a signed transaction and return its signature
+
+    An RPC error response means the transaction was rejected. Any other
+    failure (timeout, dropped connection) leaves its fate unknown, so it is
+    reported with the signature, which is fixed once the tx is signed.
+    """
+    try:
+        result = await client.send_raw_transaction(bytes(tx), opts=opts)
+    except RPCException:
+        raise
+    except Exception as e:
+        signature = str(tx.signatures[0])
+        raise TettoPaymentUnconfirmedError(
+            f"Sending transaction {signature} failed ({e!r}); it may still land",
+            tx_signature=signature,
+        ) from e
+    return str(result.value)
+
+
+async def build_and_send_payment(
+    rpc_url: str,
+    payer_keypair: Keypair,
+    agent_wallet: Pubkey,
+    protocol_wallet: Pubkey,
+    price_usd: Union[float, Decimal],
+    token: str = "USDC",
+    usdc_mint: Union[str, Pubkey] = "",
+    fee_bps: int = 1000,
+    debug: bool = False,
+    recent_blockhash: Optional[Hash] = None,
+    ws_url: Optional[str] = None,
+    use_transfer_checked: bool = True,
+    wait_for_confirmation: bool = True,
+    skip_preflight: bool = True,
+    sol_price: Optional[float] = None,
+    payer_ata: Optional[Pubkey] = None,
+    protocol_ata: Optional[Pubkey] = None,
+) -> str:
+    """
+    Build, sign, and send payment transaction
+    
+    Supports USDC (primary) and SOL. The blockhash comes from the shared
+    BlockhashCache unless recent_blockhash is passed in. Confirmation is
+    awaited over the RPC WebSocket (ws_url, derived from rpc_url by default).
+    
+    use_transfer_checked=False sends the USDC protocol fee as a plain SPL
+    Transfer (smaller tx) instead of TransferChecked; only use it if the
+    Tetto backend accepts that form.
+    
+    wait_for_confirmation=False returns the signature as soon as the RPC
+    accepts the transaction; confirm it later with confirm_signature().
+    
+    The transaction is sent with skip_preflight=True by default; pass
+    skip_preflight=False to have the RPC simulate it first.
+    
+    For SOL payments, sol_price is the SOL/USD rate used to convert
+    price_usd (see tetto.pricing.PriceCache); it is required.
+    
+    For USDC payments, payer_ata and protocol_ata may be passed when the
+    caller has already derived them for usdc_mint (see TettoClient).
+    
+    Amounts are computed with Decimal/integer math: price_usd (a float or
+    Decimal) is rounded half-even to base units, and the protocol fee is
+    amount * fee_bps // 10000, where fee_bps must be a whole number from
+    0 to 10000 (1000.0 is accepted as 1000).
+    
+    Progress is logged to the "tetto.transactions" logger at DEBUG level,
+    or printed to stdout instead when debug=True.
+    
+    Raises:
+        ValueError: If fee_bps is invalid, or sol_price is missing for SOL
+        TettoTransactionFailedError: If the transaction failed on-chain
+        TettoPaymentUnconfirmedError: If it was sent but could not be
+            confirmed; its tx_signature may still land
+    """
+    client = _get_client(rpc_url)
+    blockhash_cache = get_blockhash_cache(rpc_url)
+    
+    # Get recent blockhash (cached; see BlockhashCache)
+    if recent_blockhash is None:
+        recent_blockhash = await blockhash_cache.latest()
+    
+    instructions = _payment_instructions(
+        payer_keypair.pubkey(),
+        agent_wallet,
+        protocol_wallet,
+        price_usd,
+        token=token,
+        usdc_mint=usdc_mint,
+        fee_bps=fee_bps,
+        use_transfer_checked=use_transfer_checked,
+        sol_price=sol_price,
+        payer_ata=payer_ata,
+        protocol_ata=protocol_ata,
+        debug=debug,
+    )
+    
+    # Build and sign transaction (ed25519 signing runs off the event loop)
+    msg = await _claim_message(blockhash_cache, instructions, payer_keypair.pubkey(), recent_blockhash)
+    tx = await asyncio.to_thread(Transaction, [payer_keypair], msg, msg.recent_blockhash)
+    
+    # Send transaction
+    _debug(debug, "📡 Sending transaction...")
+    
+    # Preflight simulation adds latency and tells us nothing new about a
+    # transaction we built ourselves; a bad tx still fails on-chain (and
+    # confirm_signature() reports it) but costs the network fee.
+    signature = await _send_transaction(
+        client,
+        tx,
+        TxOpts(skip_preflight=skip_preflight, preflight_commitment=Confirmed),
+    )
+    
+    _debug(debug, "   ✅ Transaction sent: %s", signature)
+    
+    if not wait_for_confirmation:
         return signature
+    
+    # Wait for confirmation
+    _debug(debug, "   Waiting for confirmation...")
+    
+    await confirm_signature(rpc_url, signature, ws_url=ws_url, debug=debug)
+    
+    _debug(debug, "   ✅ Confirmed!")
+    
+    return signature
+
+
+async def send_many(
+    rpc_url: str,
+    payer_keypair: Keypair,
+    payments: List[Dict[str, Any]],
+    batch_size: int = SEND_BATCH_SIZE,
+    wait_for_confirmation: bool = True,
+    skip_preflight: bool = True,
+    debug: bool = False,
+) -> List[Union[str, BaseException]]:
+    """
+    Build, sign, and send several payments from one payer
+
+    Each entry in payments holds the per-payment arguments of
+    build_and_send_payment(): agent_wallet, protocol_wallet, price_usd and
+    optionally token, usdc_mint, fee_bps, use_transfer_checked, sol_price,
+    payer_ata, protocol_ata.
+
+    The blockhash is fetched once for the whole set, transactions are
+    signed in parallel off the event loop, and at most batch_size are
+    submitted at a time so RPC provider rate limits are respected.
+    Confirmation uses one getSignatureStatuses poll loop for all of them
+    (see confirm_signatures()).
+
+    Returns:
+        Results in the same order as payments: the signature of each sent
+        payment, or the exception for one that could not be built, sent,
+        or confirmed. A failure never stops the other payments, so every
+        signature that reached the RPC is reported.
+    """
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+    client = _get_client(rpc_url)
+    blockhash_cache = get_blockhash_cache(rpc_url)
+    payer = payer_keypair.pubkey()
+    opts = TxOpts(skip_preflight=skip_preflight, preflight_commitment=Confirmed)
+    
+    recent_blockhash = await blockhash_cache.latest()
+    
+    async def _send_one(payment: Dict[str, Any]) -> str:
+        nonlocal recent_blockhash
+        instructions = _payment_instructions(payer, debug=debug, **payment)
+        msg = await _claim_message(blockhash_cache, instructions, payer, recent_blockhash)
+        recent_blockhash = msg.recent_blockhash
+        tx = await asyncio.to_thread(Transaction, [payer_keypair], msg, msg.recent_blockhash)
+        return await _send_transaction(client, tx, opts)
+    
+    results: List[Union[str, BaseException]] = []
+    for start in range(0, len(payments), batch_size):
+        batch = payments[start:start + batch_size]
+        _debug(debug, "📡 Sending %d transactions...", len(batch))
+        results.extend(await asyncio.gather(
+            *(_send_one(payment) for payment in batch),
+            return_exceptions=True,
+        ))
+    
+    signatures = [result for result in results if isinstance(result, str)]
+    _debug(debug, "   ✅ %d of %d transactions sent", len(signatures), len(payments))
+    
+    if wait_for_confirmation and signatures:
+        errors = await _confirm_all(client, signatures, time.monotonic() + CONFIRM_TIMEOUT)
+        results = [
+            errors.get(result, result) if isinstance(result, str) else result
+            for result in results
+        ]
+        _debug(debug, "   ✅ %d confirmed", len(signatures) - len(errors))
+    
+    return results
@@ -3,36 +3,58 @@ Wallet management utilities
 """
 
 import os
-import json
 from pathlib import Path
+from typing import Union
 from solders.keypair import Keypair
 
+from ._json import loads
+
+
+def _keypair_from_secret(secret: Union[bytes, str]) -> Keypair:
+    """Parse a 64-byte secret key: a JSON byte array or a base58 string"""
+    secret = secret.strip()
+    if isinstance(secret, bytes):
+        is_json = secret.startswith(b"[")
+    else:
+        is_json = secret.startswith("[")
+    
+    if is_json:
+        try:
+            secret_key = loads(secret)
+            if not isinstance(secret_key, list) or len(secret_key) != 64:
+                raise ValueError("expected a 64-byte array")
+            # bytes() rejects values outside 0..255 and non-integers
+            return Keypair.from_bytes(bytes(secret_key))
+        except (ValueError, TypeError) as e:
+            raise ValueError("Invalid keypair format") from e
+    
+    try:
+        if isinstance(secret, bytes):
+            secret = secret.decode("ascii")
+        return Keypair.from_base58_string(secret)
+    except ValueError as e:
+        raise ValueError("Invalid keypair format") from e
+
 
 def load_keypair_from_file(path: str) -> Keypair:
-    """Load Solana keypair from file"""
+    """Load Solana keypair from file (JSON byte array or base58 string)"""
     expanded_path = Path(path).expanduser()
     
     if not expanded_path.exists():
         raise FileNotFoundError(f"Keypair file not found: {expanded_path}")
     
-    with open(expanded_path, "r") as f:
-        secret_key = json.load(f)
-    
-    if not isinstance(secret_key, list) or len(secret_key) != 64:
-        raise ValueError("Invalid keypair format")
-    
-    return Keypair.from_bytes(bytes(secret_key))
+    with open(expanded_path, "rb") as f:
+        return _keypair_from_secret(f.read())
 
 
 def load_keypair_from_env(env_var: str = "SOLANA_PRIVATE_KEY") -> Keypair:
-    """Load Solana keypair from environment variable"""
+    """Load Solana keypair from environment variable (JSON byte array or base58 string)"""
     secret_key_str = os.getenv(env_var)
     
     if not secret_key_str:
         raise ValueError(f"{env_var} not set")
     
-    secret_key = json.loads(secret_key_str)
-    return Keypair.from_bytes(bytes(secret_key))
+    return _keypair_from_secret(secret_key_str)
 
 
 def generate_keypair() -> Keypair: